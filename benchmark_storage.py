@@ -0,0 +1,82 @@
+import argparse
+import csv
+import datetime
+import os
+import random
+import tempfile
+import time
+
+import scraper
+
+STORAGE_FORMATS = {
+    'csv': 'donations.csv',
+    'gzip': 'donations.csv.gz',
+}
+COMMENT_WORDS = ['praying', 'for', 'you', 'and', 'your', 'family', 'thank', 'standing', 'up', 'god', 'bless', 'freedom', 'keep', 'going', 'strong']
+DONOR_NAMES = ['Anonymous', 'Anonymous Giver', 'John Smith', 'Jane Doe', 'Mary Johnson', 'Robert Brown', 'Linda Davis', 'Michael Miller']
+
+def generate_donation_rows(num_rows, num_campaigns, seed=42):
+    """Generates synthetic donations.csv rows with realistic repetition of URLs, names and comments."""
+    rng = random.Random(seed)
+    campaign_urls = [f"https://www.givesendgo.com/campaign-{i:05d}" for i in range(num_campaigns)]
+    scraped_at = datetime.datetime.now().isoformat()
+    rows = []
+    for _ in range(num_rows):
+        comment = ' '.join(rng.choice(COMMENT_WORDS) for _ in range(rng.randint(0, 25)))
+        amount = f"${rng.choice([5, 10, 20, 25, 50, 100, 250, 1000]):,}"
+        relative_time = f"{rng.randint(1, 23)} hours ago"
+        rows.append(scraper.build_donation_row(rng.choice(campaign_urls), rng.choice(DONOR_NAMES), amount, relative_time, comment, scraped_at))
+    return rows
+
+def benchmark_format(storage_format, rows, batch_size, directory):
+    """Appends rows in scrape-sized batches, then measures disk footprint and streaming read throughput."""
+    scraper.DONATIONS_CSV = os.path.join(directory, STORAGE_FORMATS[storage_format])
+    with scraper.open_donations_text('w') as f:
+        csv.writer(f).writerow(scraper.DONATION_FIELDNAMES)
+
+    start = time.perf_counter()
+    for batch_start in range(0, len(rows), batch_size):
+        scraper.append_donation_rows(rows[batch_start:batch_start + batch_size])
+    append_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scraper.calculate_summed_donations_for_url(rows[0][0])
+    chunked_read_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    row_count = sum(1 for _ in scraper.iter_donation_rows_with_locators())
+    row_read_seconds = time.perf_counter() - start
+
+    return {
+        'format': storage_format,
+        'bytes': os.path.getsize(scraper.DONATIONS_CSV),
+        'append_rows_per_sec': len(rows) / append_seconds,
+        'chunked_read_rows_per_sec': row_count / chunked_read_seconds,
+        'row_read_rows_per_sec': row_count / row_read_seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare disk footprint and read throughput of plain CSV and gzip donations storage.")
+    parser.add_argument("-rows", metavar='N', type=int, default=200000, help="Number of synthetic donations to write. Default is 200000.")
+    parser.add_argument("-campaigns", metavar='N', type=int, default=200, help="Number of distinct campaign URLs. Default is 200.")
+    parser.add_argument("-batch_size", metavar='N', type=int, default=20, help="Rows per append, mimicking one 'Load More' batch. Default is 20.")
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} synthetic donations across {args.campaigns} campaigns...")
+    rows = generate_donation_rows(args.rows, args.campaigns)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for storage_format in STORAGE_FORMATS:
+            print(f"Benchmarking {storage_format} storage...")
+            results.append(benchmark_format(storage_format, rows, args.batch_size, directory))
+
+    csv_bytes = results[0]['bytes']
+    print(f"\n{'format':<8}{'size (bytes)':>16}{'vs csv':>9}{'append rows/s':>16}{'chunked read rows/s':>22}{'row read rows/s':>18}")
+    for result in results:
+        print(f"{result['format']:<8}{result['bytes']:>16,}{result['bytes'] / csv_bytes:>9.1%}{result['append_rows_per_sec']:>16,.0f}"
+              f"{result['chunked_read_rows_per_sec']:>22,.0f}{result['row_read_rows_per_sec']:>18,.0f}")
+    print("\nchunked read: calculate_summed_donations_for_url (pandas chunks); row read: iter_donation_rows_with_locators (index rebuilds).")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import time
 import datetime
 import csv
+import gzip
 import os
 import argparse
+import io
+import re
+import sqlite3
+import zlib
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
@@ -18,47 +23,964 @@ from thefuzz import fuzz
 
 load_dotenv()
 
-DONATIONS_CSV = 'donations.csv'
+# DONATIONS_STORAGE=gzip in .env stores donations as gzip frames in donations.csv.gz
+DONATIONS_STORAGE = os.getenv('DONATIONS_STORAGE', 'csv').strip().lower()
+if DONATIONS_STORAGE not in ('csv', 'gzip'):
+    print(f"Warning: unknown DONATIONS_STORAGE '{DONATIONS_STORAGE}'. Falling back to csv.")
+    DONATIONS_STORAGE = 'csv'
+DONATIONS_CSV = 'donations.csv.gz' if DONATIONS_STORAGE == 'gzip' else 'donations.csv'
 CAMPAIGNS_CSV = 'campaigns.csv'
+CAMPAIGN_HISTORY_CSV = 'campaign_history.csv'
+CAMPAIGN_LATEST_INDEX_CSV = 'campaign_latest_index.csv'
+DONATION_ROLLUPS_DB = 'donation_rollups.db'
+DONOR_INDEX_DB = 'donor_index.db'
+SEARCH_INDEX_DB = 'search_index.db'
+
+CAMPAIGN_FIELDNAMES = ['campaign_url', 'total_donors_count', 'amount_raised', 'campaign_creator', 'funds_receiver', 'campaign_title', 'campaign_description', 'last_update_date', 'last_update_content', 'summed_donations', 'scraped_at']
+CAMPAIGN_LATEST_INDEX_FIELDNAMES = ['campaign_url', 'history_offset']
+DONATION_FIELDNAMES = ['campaign_url', 'donor_name', 'amount', 'donation_relative_time', 'comment', 'scraped_at', 'amount_value', 'currency', 'donated_at_estimated']
+DONATION_TYPED_COLUMNS = ['amount_value', 'currency', 'donated_at_estimated']
+
+# Donation storage
+DONATION_READ_CHUNK_SIZE = 100000
+# Gzip row locators encode (frame offset, row in frame) as frame_offset * DONATION_FRAME_MAX_ROWS + row_in_frame
+DONATION_FRAME_MAX_ROWS = 4096
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+GZIP_READ_SIZE = 1 << 16
+
+# Metadata kept in each SQLite index built from donations storage, so stale indexes are detected
+# and rows appended since the last sync (e.g. by an interrupted scrape) are caught up
+INDEX_SYNC_BATCH_SIZE = 10000
+INDEX_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Patterns shared by the per-row (scrape time) and vectorized (backfill) parsers
+AMOUNT_NUMBER_REGEX = r'(\d[\d,]*(?:\.\d+)?)'
+CURRENCY_CODE_REGEX = r'\b([A-Z]{3})\b'
+CURRENCY_SYMBOLS = {'$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', '₹': 'INR'}
+DEFAULT_CURRENCY = 'USD'
+RELATIVE_TIME_REGEX = r'(?i)\b(\d+|an?|one)\s+(second|minute|hour|day|week|month|year)s?\s+ago\b'
+RELATIVE_TIME_JUST_NOW_REGEX = r'(?i)\b(?:just now|moments? ago|few seconds ago)\b'
+RELATIVE_TIME_UNIT_SECONDS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+    'week': 7 * 86400,
+    'month': 30 * 86400, # Approximation; the site only shows coarse relative times
+    'year': 365 * 86400,
+}
+
+# Donation velocity rollups
+ROLLUP_FIELDNAMES = ['campaign_url', 'bucket_start', 'donation_count', 'amount_total']
+# Granularity -> (rollup table, length of the donated_at_estimated prefix that identifies the bucket, bucket suffix)
+ROLLUP_GRANULARITIES = {
+    'hourly': ('rollups_hourly', 13, ':00:00'),
+    'daily': ('rollups_daily', 10, ''),
+}
+VELOCITY_SPIKE_STDDEVS = 3
+DONATION_ROLLUPS_SCHEMA_VERSION = 1
+# One row per (campaign, bucket), upserted as donations arrive; bucket_start is indexed for time-window queries
+DONATION_ROLLUPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups_hourly (
+    campaign_url TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    donation_count INTEGER NOT NULL,
+    amount_total REAL NOT NULL,
+    PRIMARY KEY (campaign_url, bucket_start)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_hourly_bucket_start ON rollups_hourly (bucket_start);
+CREATE TABLE IF NOT EXISTS rollups_daily (
+    campaign_url TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    donation_count INTEGER NOT NULL,
+    amount_total REAL NOT NULL,
+    PRIMARY KEY (campaign_url, bucket_start)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_daily_bucket_start ON rollups_daily (bucket_start);
+""" + INDEX_META_SCHEMA
+
+# Donor index
+ANONYMOUS_DONOR_NAMES = ["anonymous", "anonymous giver"]
+DONOR_SIMILARITY_THRESHOLD = 88
+# New names are only fuzzy-matched against clusters sharing a block key: the first letters of
+# a pair of name tokens ('jo|sm' for 'john a smith'), or of the only token for one-word names
+DONOR_BLOCK_PREFIX_LENGTH = 2
+DONOR_INDEX_SCHEMA_VERSION = 3 # Bump when the schema changes; older index files are rebuilt
+DONOR_LOOKUP_ROW_LIMIT = 10
+DONOR_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS donor_clusters (
+    cluster_id INTEGER PRIMARY KEY,
+    canonical_name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS donor_cluster_blocks (
+    block_key TEXT NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    PRIMARY KEY (block_key, cluster_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS donor_names (
+    normalized_name TEXT PRIMARY KEY,
+    cluster_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS donor_aliases (
+    cluster_id INTEGER NOT NULL,
+    alias TEXT NOT NULL,
+    PRIMARY KEY (cluster_id, alias)
+);
+CREATE TABLE IF NOT EXISTS donor_campaign_totals (
+    cluster_id INTEGER NOT NULL,
+    campaign_url TEXT NOT NULL,
+    donation_count INTEGER NOT NULL,
+    amount_total REAL NOT NULL,
+    PRIMARY KEY (cluster_id, campaign_url)
+);
+CREATE INDEX IF NOT EXISTS idx_donor_campaign_totals_campaign ON donor_campaign_totals (campaign_url);
+CREATE TABLE IF NOT EXISTS donor_donation_offsets (
+    cluster_id INTEGER NOT NULL,
+    campaign_url TEXT NOT NULL,
+    row_offset INTEGER NOT NULL,
+    donated_at_estimated TEXT NOT NULL
+);
+-- Newest first; the site lists donations newest first, so within one estimated time the earlier row is newer
+CREATE INDEX IF NOT EXISTS idx_donor_donation_offsets_recent ON donor_donation_offsets (cluster_id, donated_at_estimated DESC, row_offset);
+""" + INDEX_META_SCHEMA
+
+# Full-text search index
+SEARCH_INDEX_SCHEMA_VERSION = 2 # Bump when the schema changes; older index files are rebuilt
+# URLs are split into many tokens by FTS5, so campaigns are filtered on an indexed one-token key ('c12')
+SEARCH_COMMENT_COLUMNS = '{comment donor_name}'
+SEARCH_CAMPAIGN_TEXT_COLUMNS = '{campaign_title campaign_description last_update_content}'
+SEARCH_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaign_keys (
+    campaign_id INTEGER PRIMARY KEY,
+    campaign_url TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS donation_comments_fts USING fts5(
+    comment, donor_name, campaign_key, campaign_url UNINDEXED, row_offset UNINDEXED,
+    tokenize = 'porter unicode61', prefix = '2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS campaign_text_fts USING fts5(
+    campaign_title, campaign_description, last_update_content, campaign_key, campaign_url UNINDEXED,
+    tokenize = 'porter unicode61', prefix = '2 3'
+);
+""" + INDEX_META_SCHEMA
 
 def init_csv_files():
     """Initializes CSV files with headers if they don't exist."""
-    if not os.path.exists(DONATIONS_CSV):
-        with open(DONATIONS_CSV, 'w', newline='', encoding='utf-8') as f:
+    repair_donations_storage()
+    convert_donations = not os.path.exists(DONATIONS_CSV) and os.path.exists(get_alternate_donations_path())
+    if not os.path.exists(DONATIONS_CSV) and not convert_donations:
+        with open_donations_text('w') as f:
             writer = csv.writer(f)
-            writer.writerow(['campaign_url', 'donor_name', 'amount', 'donation_relative_time', 'comment', 'scraped_at'])
+            writer.writerow(DONATION_FIELDNAMES)
     
     if not os.path.exists(CAMPAIGNS_CSV):
         with open(CAMPAIGNS_CSV, 'w', newline='', encoding='utf-8') as f:
-            # Define headers for campaigns.csv
-            fieldnames = ['campaign_url', 'total_donors_count', 'amount_raised', 'campaign_creator', 'funds_receiver', 'campaign_title', 'campaign_description', 'last_update_date', 'last_update_content', 'summed_donations', 'scraped_at']
-            dict_writer = csv.DictWriter(f, fieldnames=fieldnames)
+            dict_writer = csv.DictWriter(f, fieldnames=CAMPAIGN_FIELDNAMES)
             dict_writer.writeheader()
 
+    if not os.path.exists(CAMPAIGN_HISTORY_CSV):
+        with open(CAMPAIGN_HISTORY_CSV, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(CAMPAIGN_FIELDNAMES)
+        with open(CAMPAIGN_LATEST_INDEX_CSV, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(CAMPAIGN_LATEST_INDEX_FIELDNAMES)
+        seed_campaign_history_from_campaigns_csv()
+    elif not os.path.exists(CAMPAIGN_LATEST_INDEX_CSV):
+        rebuild_campaign_latest_index()
+
+    if convert_donations:
+        # Done last so the rebuilt search index can see the campaign history
+        print(f"{DONATIONS_CSV} not found but {get_alternate_donations_path()} exists. Converting...")
+        convert_donations_storage()
+
 def append_to_csv(filepath, row_data):
     """Appends a row to the specified CSV file."""
     with open(filepath, 'a', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(row_data)
 
-def get_scraped_campaigns():
-    """Reads the campaigns CSV and returns a set of scraped campaign URLs."""
-    scraped = set()
-    if not os.path.exists(CAMPAIGNS_CSV):
-        return scraped
+def append_to_csv_with_offset(filepath, row_data):
+    """Appends a row to the specified CSV file and returns the byte offset where the row starts."""
+    with open(filepath, 'ab') as f:
+        f.seek(0, os.SEEK_END)
+        offset = f.tell()
+        f.write(csv_rows_to_bytes([row_data]))
+    return offset
+
+def read_csv_row_at_offset(filepath, offset):
+    """Reads the single CSV row starting at the given byte offset (quoted newlines included)."""
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        reader = csv.reader(io.TextIOWrapper(f, encoding='utf-8', newline=''))
+        return next(reader, None)
+
+def iter_csv_rows_with_offsets(filepath, start_offset=0, end_offset=None):
+    """
+    Yields (byte_offset, row) for every data row of a CSV file, skipping the header.
+    Rows spanning several lines (quoted newlines) are reassembled before parsing.
+    Iteration can resume at a row boundary (start_offset) and stops before end_offset.
+    """
+    with open(filepath, 'rb') as f:
+        if start_offset:
+            f.seek(start_offset)
+        else:
+            f.readline() # Skip header
+        while True:
+            offset = f.tell()
+            if end_offset is not None and offset >= end_offset:
+                break
+            record = f.readline()
+            if not record:
+                break
+            # An odd number of quote characters means a quoted field continues on the next line
+            while record.count(b'"') % 2 == 1:
+                next_line = f.readline()
+                if not next_line:
+                    break
+                record += next_line
+            row = next(csv.reader(io.StringIO(record.decode('utf-8'), newline='')), None)
+            if row:
+                yield offset, row
+
+def csv_rows_to_bytes(rows):
+    """Serializes rows as UTF-8 encoded CSV."""
+    rows_buffer = io.StringIO()
+    csv.writer(rows_buffer).writerows(rows)
+    return rows_buffer.getvalue().encode('utf-8')
+
+def donations_storage_is_gzip():
+    """Returns True if donations are stored as gzip frames rather than plain CSV."""
+    return DONATIONS_CSV.endswith('.gz')
+
+def get_alternate_donations_path():
+    """Returns the donations path of the storage format that is not configured."""
+    return DONATIONS_CSV[:-len('.gz')] if donations_storage_is_gzip() else DONATIONS_CSV + '.gz'
+
+def get_donations_storage_conflict():
+    """
+    Returns why the configured donations file should not be used, or None. Donations in the
+    other storage format being newer means DONATIONS_STORAGE was switched back after scraping.
+    """
+    alternate_path = get_alternate_donations_path()
+    if os.path.exists(DONATIONS_CSV) and os.path.exists(alternate_path) and os.path.getmtime(alternate_path) > os.path.getmtime(DONATIONS_CSV):
+        return (f"{alternate_path} is newer than {DONATIONS_CSV}, so donations scraped with the other DONATIONS_STORAGE setting would be ignored. "
+                f"Run -convert_donations to convert {alternate_path} into {DONATIONS_CSV}, or move one of the files away.")
+    return None
+
+def open_donations_text(mode='r'):
+    """Opens donations storage as text for reading ('r') or writing ('w'), plain or gzip."""
+    if donations_storage_is_gzip():
+        return gzip.open(DONATIONS_CSV, mode + 't', newline='', encoding='utf-8')
+    return open(DONATIONS_CSV, mode, newline='', encoding='utf-8')
+
+def read_gzip_frame(f):
+    """Decompresses the single gzip frame (member) starting at the current position of binary file f."""
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    frame_parts = []
+    while not decompressor.eof:
+        compressed = f.read(GZIP_READ_SIZE)
+        if not compressed:
+            raise ValueError(f"Truncated gzip frame in {f.name}")
+        frame_parts.append(decompressor.decompress(compressed))
+    return b''.join(frame_parts)
+
+def iter_gzip_frames(filepath, start_offset=0):
+    """
+    Yields (frame_offset, decompressed_bytes) for each gzip frame of a multi-frame gzip file.
+    start_offset must be a frame boundary, such as a file size recorded after an append.
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(start_offset)
+        frame_offset = start_offset
+        pending = f.read(GZIP_READ_SIZE)
+        while pending:
+            decompressor = zlib.decompressobj(GZIP_WBITS)
+            frame_parts = []
+            consumed = 0
+            while True:
+                frame_parts.append(decompressor.decompress(pending))
+                if decompressor.eof:
+                    consumed += len(pending) - len(decompressor.unused_data)
+                    pending = decompressor.unused_data
+                    break
+                consumed += len(pending)
+                pending = f.read(GZIP_READ_SIZE)
+                if not pending:
+                    raise ValueError(f"Truncated gzip frame at offset {frame_offset} in {filepath}")
+            yield frame_offset, b''.join(frame_parts)
+            frame_offset += consumed
+            if not pending:
+                pending = f.read(GZIP_READ_SIZE)
+
+def find_gzip_frames_end(filepath, start_offset=0):
+    """
+    Returns the offset just past the run of complete gzip frames that starts at start_offset
+    (a frame boundary), stopping at a truncated or corrupt frame.
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(start_offset)
+        position = frames_end = start_offset
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        compressed = f.read(GZIP_READ_SIZE)
+        while compressed:
+            try:
+                decompressor.decompress(compressed)
+            except zlib.error:
+                break
+            if decompressor.eof:
+                position += len(compressed) - len(decompressor.unused_data)
+                frames_end = position
+                compressed = decompressor.unused_data
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+            else:
+                position += len(compressed)
+                compressed = b''
+            if not compressed:
+                compressed = f.read(GZIP_READ_SIZE)
+    return frames_end
+
+def append_donation_rows(rows):
+    """
+    Appends rows to donations storage and returns a row locator for each.
+    Plain CSV locators are byte offsets. Gzip storage writes each call's rows as
+    independent gzip frames, so appends never recompress existing data.
+    """
+    locators = []
+    with open(DONATIONS_CSV, 'ab') as f:
+        f.seek(0, os.SEEK_END)
+        if not donations_storage_is_gzip():
+            for row in rows:
+                locators.append(f.tell())
+                f.write(csv_rows_to_bytes([row]))
+            return locators
+        for start in range(0, len(rows), DONATION_FRAME_MAX_ROWS):
+            frame_rows = rows[start:start + DONATION_FRAME_MAX_ROWS]
+            frame_offset = f.tell()
+            f.write(gzip.compress(csv_rows_to_bytes(frame_rows)))
+            locators.extend(frame_offset * DONATION_FRAME_MAX_ROWS + row_in_frame for row_in_frame in range(len(frame_rows)))
+    return locators
+
+def read_donation_row(locator):
+    """Reads a single donations row by the locator returned from append_donation_rows."""
+    if not donations_storage_is_gzip():
+        return read_csv_row_at_offset(DONATIONS_CSV, locator)
+    frame_offset, row_in_frame = divmod(locator, DONATION_FRAME_MAX_ROWS)
+    with open(DONATIONS_CSV, 'rb') as f:
+        f.seek(frame_offset)
+        frame = read_gzip_frame(f)
+    frame_rows = list(csv.reader(io.StringIO(frame.decode('utf-8'), newline='')))
+    return frame_rows[row_in_frame] if row_in_frame < len(frame_rows) else None
+
+def iter_donation_rows_with_locators(start_position=0, end_position=None):
+    """
+    Yields (locator, row) for every donation, streaming from plain or gzip storage.
+    start_position/end_position are byte positions in the file, e.g. sizes recorded after appends,
+    so an index can catch up on just the rows appended since it was last synced.
+    """
+    if not donations_storage_is_gzip():
+        yield from iter_csv_rows_with_offsets(DONATIONS_CSV, start_position, end_position)
+        return
+    for frame_offset, frame in iter_gzip_frames(DONATIONS_CSV, start_position):
+        if end_position is not None and frame_offset >= end_position:
+            break
+        if frame_offset == 0:
+            continue # The first frame only holds the header
+        for row_in_frame, row in enumerate(csv.reader(io.StringIO(frame.decode('utf-8'), newline=''))):
+            yield frame_offset * DONATION_FRAME_MAX_ROWS + row_in_frame, row
+
+def get_indexed_donations_position():
+    """Returns the largest donations position recorded by an up-to-date index or rollup database, else 0."""
+    positions = [0]
+    for db_path, schema_version in [(DONATION_ROLLUPS_DB, DONATION_ROLLUPS_SCHEMA_VERSION),
+                                    (DONOR_INDEX_DB, DONOR_INDEX_SCHEMA_VERSION),
+                                    (SEARCH_INDEX_DB, SEARCH_INDEX_SCHEMA_VERSION)]:
+        if get_index_rebuild_reason(db_path, schema_version) is None:
+            positions.append(int(read_index_meta(db_path).get('indexed_bytes', 0)))
+    return max(positions)
+
+def repair_donations_storage():
+    """
+    Cuts off a partially written row or gzip frame left at the end of donations storage by an
+    interrupted scrape, so later appends, reads and index syncs are not broken by it. Gzip data
+    is cut at the first damaged frame, even if later batches were appended after it. The cut
+    bytes are appended to a .damaged file next to the donations file instead of being discarded.
+    """
+    if not os.path.exists(DONATIONS_CSV):
+        return
+    donations_size = os.path.getsize(DONATIONS_CSV)
+    if donations_storage_is_gzip():
+        # Indexed positions are frame boundaries of complete data, so usually only newer frames are scanned
+        start_offset = get_indexed_donations_position()
+        valid_size = find_gzip_frames_end(DONATIONS_CSV, start_offset if start_offset <= donations_size else 0)
+        if valid_size < donations_size and start_offset > 0:
+            valid_size = find_gzip_frames_end(DONATIONS_CSV) # Confirm from the start before cutting anything
+    else:
+        with open(DONATIONS_CSV, 'rb') as f:
+            f.seek(max(donations_size - GZIP_READ_SIZE, 0))
+            tail = f.read()
+        valid_size = donations_size
+        # A complete row always ends with a newline
+        if tail and not tail.endswith(b'\n') and b'\n' in tail:
+            valid_size = donations_size - len(tail) + tail.rfind(b'\n') + 1
+    if valid_size == donations_size:
+        return
+
+    damaged_path = DONATIONS_CSV + '.damaged'
+    with open(DONATIONS_CSV, 'r+b') as f:
+        f.seek(valid_size)
+        with open(damaged_path, 'ab') as damaged_file:
+            damaged_file.write(f.read())
+        f.truncate(valid_size)
+    print(f"Warning: removed {donations_size - valid_size:,} bytes of partially written donations from the end of {DONATIONS_CSV} "
+          f"(saved to {damaged_path}).")
+
+def read_donations_in_chunks(columns):
+    """Streams the given donation columns (those present in the file) as DataFrame chunks."""
+    return pd.read_csv(DONATIONS_CSV, usecols=lambda column: column in columns, chunksize=DONATION_READ_CHUNK_SIZE,
+                       dtype={'campaign_url': str, 'donor_name': str, 'amount': str})
+
+def write_donations_dataframe(df):
+    """Atomically rewrites donations storage from a DataFrame, in the configured format."""
+    temp_path = DONATIONS_CSV + '.tmp'
+    if not donations_storage_is_gzip():
+        df.to_csv(temp_path, index=False, encoding='utf-8')
+    else:
+        with open(temp_path, 'wb') as f:
+            f.write(gzip.compress(csv_rows_to_bytes([list(df.columns)]))) # Header gets its own frame
+            for start in range(0, len(df), DONATION_FRAME_MAX_ROWS):
+                frame_df = df.iloc[start:start + DONATION_FRAME_MAX_ROWS]
+                f.write(gzip.compress(frame_df.to_csv(index=False, header=False).encode('utf-8')))
+    os.replace(temp_path, DONATIONS_CSV)
+
+def convert_donations_storage():
+    """Converts donations from the other storage format into the configured one and rebuilds the row indexes."""
+    source_path = get_alternate_donations_path()
+    if not os.path.exists(source_path):
+        print(f"{source_path} not found. Nothing to convert.")
+        return
     try:
-        with open(CAMPAIGNS_CSV, 'r', newline='', encoding='utf-8') as f:
-            # Skip header row before reading
-            next(f, None) 
-            reader = csv.reader(f)
-            for row in reader:
-                if row: # Ensure row is not empty
-                    scraped.add(row[0]) # campaign_url is the first column
-    except FileNotFoundError:
-        pass 
+        df = pd.read_csv(source_path, dtype=str, keep_default_na=False)
+        write_donations_dataframe(df)
+    except Exception as e:
+        print(f"Error converting {source_path} to {DONATIONS_CSV}: {e}")
+        return
+    # Renamed so it is not picked up again, e.g. if DONATIONS_STORAGE is later switched back
+    backup_path = source_path + '.bak'
+    os.replace(source_path, backup_path)
+    print(f"Converted {len(df)} donations from {source_path} to {DONATIONS_CSV} ({os.path.getsize(backup_path):,} -> {os.path.getsize(DONATIONS_CSV):,} bytes). "
+          f"{source_path} was renamed to {backup_path} and can be removed.")
+    # Row locators differ between formats
+    rebuild_donor_index()
+    rebuild_search_index()
+
+def parse_amount_text(amount_text):
+    """
+    Parses a scraped amount string such as '$1,250 USD' into (amount_value, currency).
+    Returns (None, '') if no number can be found.
+    """
+    amount_text = str(amount_text)
+    number_match = re.search(AMOUNT_NUMBER_REGEX, amount_text)
+    if not number_match:
+        return None, ''
+    amount_value = float(number_match.group(1).replace(',', ''))
+
+    code_match = re.search(CURRENCY_CODE_REGEX, amount_text)
+    if code_match:
+        return amount_value, code_match.group(1)
+    for symbol, currency in CURRENCY_SYMBOLS.items():
+        if symbol in amount_text:
+            return amount_value, currency
+    return amount_value, DEFAULT_CURRENCY
+
+def estimate_donation_timestamp(relative_time_str, scraped_at):
+    """
+    Estimates an absolute donation time from a relative time ('3 days ago')
+    and the ISO scraped_at timestamp. Returns an ISO string, or '' if unknown.
+    """
+    try:
+        scraped_at_dt = datetime.datetime.fromisoformat(str(scraped_at))
+    except ValueError:
+        return ''
+    relative_time_str = str(relative_time_str)
+    if re.search(RELATIVE_TIME_JUST_NOW_REGEX, relative_time_str):
+        return scraped_at_dt.isoformat(timespec='seconds')
+    time_match = re.search(RELATIVE_TIME_REGEX, relative_time_str)
+    if not time_match:
+        return ''
+    count_text, unit = time_match.group(1).lower(), time_match.group(2).lower()
+    count = int(count_text) if count_text.isdigit() else 1 # 'a', 'an', 'one'
+    delta = datetime.timedelta(seconds=count * RELATIVE_TIME_UNIT_SECONDS[unit])
+    return (scraped_at_dt - delta).isoformat(timespec='seconds')
+
+def normalize_amount_series(amount_series):
+    """Vectorized counterpart of parse_amount_text. Returns (amount_values, currencies)."""
+    amount_text = amount_series.astype(str)
+    amount_values = pd.to_numeric(
+        amount_text.str.extract(AMOUNT_NUMBER_REGEX, expand=False).str.replace(',', '', regex=False),
+        errors='coerce'
+    )
+    symbol_pattern = '([' + re.escape(''.join(CURRENCY_SYMBOLS)) + '])'
+    currencies = amount_text.str.extract(CURRENCY_CODE_REGEX, expand=False)
+    currencies = currencies.fillna(amount_text.str.extract(symbol_pattern, expand=False).map(CURRENCY_SYMBOLS))
+    currencies = currencies.mask(currencies.isna() & amount_values.notna(), DEFAULT_CURRENCY)
+    currencies = currencies.where(amount_values.notna(), '')
+    return amount_values, currencies
+
+def estimate_donation_timestamp_series(relative_time_series, scraped_at_series):
+    """Vectorized counterpart of estimate_donation_timestamp."""
+    relative_text = relative_time_series.astype(str)
+    scraped_at_dt = pd.to_datetime(scraped_at_series, errors='coerce', format='ISO8601')
+
+    time_parts = relative_text.str.extract(RELATIVE_TIME_REGEX)
+    counts = time_parts[0].str.lower()
+    counts = pd.to_numeric(counts.where(counts.str.isdigit().fillna(False), '1'), errors='coerce')
+    unit_seconds = time_parts[1].str.lower().map(RELATIVE_TIME_UNIT_SECONDS)
+    offset_seconds = (counts * unit_seconds).where(time_parts[1].notna())
+    offset_seconds = offset_seconds.mask(relative_text.str.contains(RELATIVE_TIME_JUST_NOW_REGEX, regex=True), 0)
+
+    donated_at = scraped_at_dt - pd.to_timedelta(offset_seconds, unit='s')
+    return donated_at.dt.strftime('%Y-%m-%dT%H:%M:%S').fillna('')
+
+def build_donation_row(url, donor_name, amount, relative_time_str, comment, scraped_at):
+    """Builds a donations.csv row, including the parsed typed columns."""
+    amount_value, currency = parse_amount_text(amount)
+    donated_at_estimated = estimate_donation_timestamp(relative_time_str, scraped_at)
+    return [url, donor_name, amount, relative_time_str, comment, scraped_at,
+            amount_value if amount_value is not None else '', currency, donated_at_estimated]
+
+def get_donation_amount_values(df):
+    """
+    Returns the numeric donation amounts of a donations DataFrame, using the
+    typed amount_value column and only parsing 'amount' for legacy data.
+    """
+    if 'amount_value' in df.columns:
+        return pd.to_numeric(df['amount_value'], errors='coerce')
+    return normalize_amount_series(df['amount'])[0]
+
+def donations_csv_needs_backfill():
+    """Returns True if donations.csv exists but predates the typed columns."""
+    if not os.path.exists(DONATIONS_CSV):
+        return False
+    try:
+        with open_donations_text() as f:
+            header = next(csv.reader(f), [])
+    except Exception as e:
+        print(f"Error reading header of {DONATIONS_CSV}: {e}")
+        return False
+    return bool(header) and not all(column in header for column in DONATION_TYPED_COLUMNS)
+
+def backfill_typed_donation_columns():
+    """
+    Converts existing donations.csv data in one vectorized pass, (re)computing
+    amount_value, currency and donated_at_estimated for every row.
+    """
+    if not os.path.exists(DONATIONS_CSV):
+        print(f"{DONATIONS_CSV} not found. Nothing to backfill.")
+        return
+
+    try:
+        df = pd.read_csv(DONATIONS_CSV, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        print(f"{DONATIONS_CSV} is empty. Nothing to backfill.")
+        return
+    except Exception as e:
+        print(f"Error reading {DONATIONS_CSV} for backfill: {e}")
+        return
+
+    df['amount_value'], df['currency'] = normalize_amount_series(df['amount'])
+    df['donated_at_estimated'] = estimate_donation_timestamp_series(df['donation_relative_time'], df['scraped_at'])
+    df = df.reindex(columns=DONATION_FIELDNAMES, fill_value='')
+
+    try:
+        write_donations_dataframe(df)
+    except Exception as e:
+        print(f"Error writing backfilled data to {DONATIONS_CSV}: {e}")
+        return
+
+    print(f"Backfilled typed columns for {len(df)} donations "
+          f"({df['amount_value'].notna().sum()} with amounts, {(df['donated_at_estimated'] != '').sum()} with estimated timestamps).")
+    rebuild_donation_rollups()
+    rebuild_donor_index() # Row offsets change when donations.csv is rewritten
+    rebuild_search_index()
+
+def backfill_donations_if_needed():
+    """
+    Backfills a donations.csv written by an older version before it is analyzed or indexed.
+    The backfill also rebuilds the rollups and indexes. Returns True if it ran.
+    """
+    if not donations_csv_needs_backfill():
+        return False
+    print(f"{DONATIONS_CSV} predates the typed amount/timestamp columns. Backfilling...")
+    backfill_typed_donation_columns()
+    return True
+
+def connect_donation_rollups():
+    """Opens the donation rollups database, creating its tables if needed."""
+    conn = sqlite3.connect(DONATION_ROLLUPS_DB)
+    conn.executescript(DONATION_ROLLUPS_SCHEMA)
+    return conn
+
+def update_donation_rollups(conn, donation_entries):
+    """
+    Adds (row_locator, row) donation entries to the hourly and daily rollups within the caller's
+    transaction. Each (campaign, bucket) keeps a single row that is upserted in place, so the
+    rollups never accumulate deltas that need compacting.
+    """
+    for table, prefix_length, bucket_suffix in ROLLUP_GRANULARITIES.values():
+        deltas = {}
+        for _, row in donation_entries:
+            row_dict = dict(zip(DONATION_FIELDNAMES, row))
+            donated_at = row_dict['donated_at_estimated']
+            if not donated_at:
+                continue # No estimated time, cannot be bucketed
+            bucket_key = (row_dict['campaign_url'], donated_at[:prefix_length] + bucket_suffix)
+            count, total = deltas.get(bucket_key, (0, 0.0))
+            amount_value = row_dict['amount_value']
+            deltas[bucket_key] = (count + 1, total + (float(amount_value) if amount_value != '' else 0.0))
+
+        conn.executemany(
+            f"""INSERT INTO {table} (campaign_url, bucket_start, donation_count, amount_total) VALUES (?, ?, ?, ?)
+                ON CONFLICT (campaign_url, bucket_start) DO UPDATE SET
+                    donation_count = donation_count + excluded.donation_count,
+                    amount_total = amount_total + excluded.amount_total""",
+            [(campaign_url, bucket_start, count, total) for (campaign_url, bucket_start), (count, total) in deltas.items()]
+        )
+
+def rebuild_donation_rollups():
+    """Rebuilds the hourly and daily rollups from donations.csv in one vectorized pass."""
+    donations_size = os.path.getsize(DONATIONS_CSV) if os.path.exists(DONATIONS_CSV) else 0
+    donations_df = pd.DataFrame(columns=['campaign_url', 'amount_value', 'donated_at_estimated'])
+    if os.path.exists(DONATIONS_CSV):
+        try:
+            donations_df = pd.read_csv(DONATIONS_CSV, usecols=lambda column: column in donations_df.columns,
+                                       dtype={'campaign_url': str, 'donated_at_estimated': str})
+        except pd.errors.EmptyDataError:
+            pass
+        except Exception as e:
+            print(f"Error reading {DONATIONS_CSV} to rebuild rollups: {e}")
+            return
+    if 'donated_at_estimated' not in donations_df.columns:
+        print(f"{DONATIONS_CSV} has no donated_at_estimated column. Run -backfill first.")
+        return
+
+    donations_df = donations_df.dropna(subset=['donated_at_estimated'])
+    donations_df = donations_df[donations_df['donated_at_estimated'] != '']
+    amount_values = pd.to_numeric(donations_df['amount_value'], errors='coerce').fillna(0)
+
+    if os.path.exists(DONATION_ROLLUPS_DB):
+        os.remove(DONATION_ROLLUPS_DB)
+    conn = connect_donation_rollups()
+    try:
+        with conn:
+            for table, prefix_length, bucket_suffix in ROLLUP_GRANULARITIES.values():
+                buckets = donations_df['donated_at_estimated'].str.slice(0, prefix_length) + bucket_suffix
+                rollups_df = (
+                    pd.DataFrame({'campaign_url': donations_df['campaign_url'], 'bucket_start': buckets, 'amount_total': amount_values})
+                    .groupby(['campaign_url', 'bucket_start'])['amount_total']
+                    .agg(donation_count='count', amount_total='sum')
+                    .reset_index()
+                )
+                conn.executemany(f"INSERT INTO {table} (campaign_url, bucket_start, donation_count, amount_total) VALUES (?, ?, ?, ?)",
+                                 rollups_df[ROLLUP_FIELDNAMES].itertuples(index=False, name=None))
+            write_index_meta(conn, {'schema_version': DONATION_ROLLUPS_SCHEMA_VERSION, **get_donations_storage_meta(), 'indexed_bytes': donations_size})
+    except Exception as e:
+        print(f"Error writing rollups to {DONATION_ROLLUPS_DB}: {e}")
+        return
+    finally:
+        conn.close()
+    print(f"Rebuilt donation rollups from {len(donations_df)} timestamped donations.")
+
+def sync_donation_rollups():
+    """
+    Catches the rollups up with donations appended since they were last synced. Missing or
+    stale rollups are rebuilt in one vectorized pass, backfilling donations.csv first if needed.
+    """
+    if backfill_donations_if_needed():
+        return
+    rebuild_reason = get_index_rebuild_reason(DONATION_ROLLUPS_DB, DONATION_ROLLUPS_SCHEMA_VERSION)
+    if rebuild_reason is not None:
+        if os.path.exists(DONATION_ROLLUPS_DB):
+            print(f"Rebuilding {DONATION_ROLLUPS_DB} because {rebuild_reason}...")
+        rebuild_donation_rollups()
+        return
+    sync_donations_index(DONATION_ROLLUPS_DB, DONATION_ROLLUPS_SCHEMA_VERSION, connect_donation_rollups, update_donation_rollups)
+
+def get_donations_storage_meta():
+    """Describes the donations storage that index row locators point into."""
+    return {
+        'donations_path': DONATIONS_CSV,
+        'donations_storage': 'gzip' if donations_storage_is_gzip() else 'csv',
+    }
+
+def read_index_meta(db_path):
+    """Returns an index database's metadata as a dict ({} if the file or metadata is missing)."""
+    if not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT key, value FROM index_meta"))
+    except sqlite3.OperationalError:
+        return {} # Built before index metadata was recorded
+    finally:
+        conn.close()
+
+def write_index_meta(conn, values):
+    """Stores index metadata values (as text) in an open index database."""
+    conn.executemany("INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", [(key, str(value)) for key, value in values.items()])
+
+def get_index_rebuild_reason(db_path, schema_version):
+    """
+    Returns why an index must be rebuilt before use, or None if it matches the current
+    schema and donations storage. Row locators differ between csv and gzip storage.
+    """
+    meta = read_index_meta(db_path)
+    if not meta:
+        return "it is missing or has no metadata"
+    if meta.get('schema_version') != str(schema_version):
+        return "it has an older schema"
+    if any(meta.get(key) != value for key, value in get_donations_storage_meta().items()):
+        return f"it was built for {meta.get('donations_storage')} storage ({meta.get('donations_path')})"
+    return None
+
+def sync_donations_index(db_path, schema_version, connect_index, index_entries, on_rebuild=None):
+    """
+    Brings an index built from donations storage up to date in a single transaction.
+    Only rows appended since the recorded indexed_bytes position are indexed, so rows
+    written by an interrupted scrape are caught up on the next run. The index is rebuilt
+    from scratch if it is stale or the donations file shrank; on_rebuild(conn) then adds
+    anything not derived from donations. A donations.csv from an older version is backfilled
+    first, which rebuilds every index. Returns the number of rows indexed.
+    """
+    if backfill_donations_if_needed():
+        return 0
+    donations_size = os.path.getsize(DONATIONS_CSV) if os.path.exists(DONATIONS_CSV) else 0
+    start_position = 0
+    rebuild_reason = get_index_rebuild_reason(db_path, schema_version)
+    if rebuild_reason is None:
+        start_position = int(read_index_meta(db_path).get('indexed_bytes', 0))
+        if start_position == donations_size:
+            return 0
+        if start_position > donations_size:
+            rebuild_reason = f"{DONATIONS_CSV} is smaller than when it was indexed"
+            start_position = 0
+    if rebuild_reason is not None and os.path.exists(db_path):
+        print(f"Rebuilding {db_path} because {rebuild_reason}...")
+        os.remove(db_path)
+
+    indexed = 0
+    conn = connect_index()
+    try:
+        with conn:
+            batch = []
+            for donation_entry in iter_donation_rows_with_locators(start_position, donations_size):
+                batch.append(donation_entry)
+                if len(batch) >= INDEX_SYNC_BATCH_SIZE:
+                    index_entries(conn, batch)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                index_entries(conn, batch)
+                indexed += len(batch)
+            if start_position == 0 and on_rebuild is not None:
+                on_rebuild(conn)
+            # Committed together with the rows, so the index never claims rows it does not hold
+            write_index_meta(conn, {'schema_version': schema_version, **get_donations_storage_meta(), 'indexed_bytes': donations_size})
+    except Exception as e:
+        print(f"Error updating {db_path}: {e}")
+        indexed = 0
+    finally:
+        conn.close()
+    return indexed
+
+def connect_donor_index():
+    """Opens the donor index database, creating its tables if needed."""
+    conn = sqlite3.connect(DONOR_INDEX_DB)
+    conn.executescript(DONOR_INDEX_SCHEMA)
+    return conn
+
+def get_donor_block_keys(normalized_name):
+    """
+    Returns the blocking keys of a donor name. Token order is ignored (like token_sort_ratio),
+    so 'smith john' and 'jon smith' share the key 'jo|sm' with 'john smith'.
+    """
+    prefixes = sorted({token[:DONOR_BLOCK_PREFIX_LENGTH] for token in re.findall(r'[^\W_]+', normalized_name)})
+    if len(prefixes) <= 1:
+        return prefixes or ['']
+    return [f"{first}|{second}" for i, first in enumerate(prefixes) for second in prefixes[i + 1:]]
+
+def find_donor_cluster(conn, normalized_name):
+    """
+    Returns the cluster_id of the best fuzzy match among donor clusters sharing
+    a block key with the name, or None. Uses the indexed block table instead of
+    comparing against every cluster.
+    """
+    block_keys = get_donor_block_keys(normalized_name)
+    placeholders = ', '.join('?' * len(block_keys))
+    candidates = conn.execute(
+        f"""SELECT DISTINCT clusters.cluster_id, clusters.canonical_name
+            FROM donor_cluster_blocks AS blocks
+            JOIN donor_clusters AS clusters ON clusters.cluster_id = blocks.cluster_id
+            WHERE blocks.block_key IN ({placeholders})""",
+        block_keys
+    )
+    best_cluster_id, best_score = None, DONOR_SIMILARITY_THRESHOLD
+    for cluster_id, canonical_name in candidates:
+        score = fuzz.token_sort_ratio(normalized_name, canonical_name)
+        if score > best_score:
+            best_cluster_id, best_score = cluster_id, score
+    return best_cluster_id
+
+def update_donor_index(conn, donation_entries):
+    """
+    Adds (row_offset, row) donation entries to the donor index within the caller's transaction.
+    New donor names are assigned to the most similar existing cluster in their blocks or start
+    a new one; anonymous and amount-less donations are skipped. The top donor analysis reads
+    these clusters too, so -list, -visualize and -donor always agree.
+    """
+    name_to_cluster = {}
+    for row_offset, row in donation_entries:
+        row_dict = dict(zip(DONATION_FIELDNAMES, row))
+        donor_name = str(row_dict['donor_name']).strip()
+        normalized_name = donor_name.lower()
+        if not normalized_name or normalized_name in ANONYMOUS_DONOR_NAMES or row_dict['amount_value'] in ('', None):
+            continue
+
+        cluster_id = name_to_cluster.get(normalized_name)
+        if cluster_id is None:
+            found = conn.execute("SELECT cluster_id FROM donor_names WHERE normalized_name = ?", (normalized_name,)).fetchone()
+            if found:
+                cluster_id = found[0]
+            else:
+                cluster_id = find_donor_cluster(conn, normalized_name)
+                if cluster_id is None:
+                    cluster_id = conn.execute("INSERT INTO donor_clusters (canonical_name) VALUES (?)", (normalized_name,)).lastrowid
+                    conn.executemany("INSERT INTO donor_cluster_blocks (block_key, cluster_id) VALUES (?, ?)",
+                                     [(block_key, cluster_id) for block_key in get_donor_block_keys(normalized_name)])
+                conn.execute("INSERT INTO donor_names (normalized_name, cluster_id) VALUES (?, ?)", (normalized_name, cluster_id))
+            name_to_cluster[normalized_name] = cluster_id
+
+        conn.execute("INSERT OR IGNORE INTO donor_aliases (cluster_id, alias) VALUES (?, ?)", (cluster_id, donor_name))
+        conn.execute(
+            """INSERT INTO donor_campaign_totals (cluster_id, campaign_url, donation_count, amount_total) VALUES (?, ?, 1, ?)
+               ON CONFLICT (cluster_id, campaign_url) DO UPDATE SET
+                   donation_count = donation_count + 1,
+                   amount_total = amount_total + excluded.amount_total""",
+            (cluster_id, row_dict['campaign_url'], float(row_dict['amount_value']))
+        )
+        conn.execute("INSERT INTO donor_donation_offsets (cluster_id, campaign_url, row_offset, donated_at_estimated) VALUES (?, ?, ?, ?)",
+                     (cluster_id, row_dict['campaign_url'], row_offset, row_dict['donated_at_estimated'] or ''))
+
+def sync_donor_index():
+    """
+    Catches the donor index up with donations appended since it was last synced, rebuilding it
+    if it is missing, has an older schema or was built for other donations storage.
+    """
+    return sync_donations_index(DONOR_INDEX_DB, DONOR_INDEX_SCHEMA_VERSION, connect_donor_index, update_donor_index)
+
+def rebuild_donor_index():
+    """Rebuilds the donor index from scratch by streaming donations.csv."""
+    if donations_csv_needs_backfill():
+        print(f"{DONATIONS_CSV} predates the typed columns. Run -backfill first.")
+        return
+    if os.path.exists(DONOR_INDEX_DB):
+        os.remove(DONOR_INDEX_DB)
+    indexed = sync_donor_index()
+    print(f"Rebuilt donor index {DONOR_INDEX_DB} from {indexed} donations.")
+
+def connect_search_index():
+    """Opens the full-text search index database, creating its FTS5 tables if needed."""
+    conn = sqlite3.connect(SEARCH_INDEX_DB)
+    conn.executescript(SEARCH_INDEX_SCHEMA)
+    return conn
+
+def get_campaign_search_key(conn, campaign_url, create=True):
+    """
+    Returns the token indexed in the campaign_key column for a campaign (e.g. 'c12'), assigning
+    the campaign an id on first use. Returns None for an unknown campaign if create is False.
+    """
+    if create:
+        conn.execute("INSERT OR IGNORE INTO campaign_keys (campaign_url) VALUES (?)", (campaign_url,))
+    found = conn.execute("SELECT campaign_id FROM campaign_keys WHERE campaign_url = ?", (campaign_url,)).fetchone()
+    return f"c{found[0]}" if found else None
+
+def update_search_index_donations(conn, donation_entries):
+    """Adds the comments of (row_offset, row) donation entries to the search index within the caller's transaction."""
+    campaign_keys = {}
+    comment_rows = []
+    for row_offset, row in donation_entries:
+        row_dict = dict(zip(DONATION_FIELDNAMES, row))
+        if str(row_dict['comment']).strip():
+            campaign_url = row_dict['campaign_url']
+            if campaign_url not in campaign_keys:
+                campaign_keys[campaign_url] = get_campaign_search_key(conn, campaign_url)
+            comment_rows.append((row_dict['comment'], row_dict['donor_name'], campaign_keys[campaign_url], campaign_url, row_offset))
+    conn.executemany("INSERT INTO donation_comments_fts (comment, donor_name, campaign_key, campaign_url, row_offset) VALUES (?, ?, ?, ?, ?)", comment_rows)
+
+def index_campaign_text(conn, campaign_data_dict):
+    """Replaces a campaign's indexed title, description and last update within the caller's transaction."""
+    text_fields = ['campaign_title', 'campaign_description', 'last_update_content']
+    texts = [campaign_data_dict.get(field, '') if campaign_data_dict.get(field, '') != 'N/A' else '' for field in text_fields]
+    campaign_key = get_campaign_search_key(conn, campaign_data_dict['campaign_url'])
+    conn.execute("DELETE FROM campaign_text_fts WHERE campaign_text_fts MATCH ?", (f"campaign_key : {campaign_key}",))
+    if any(texts):
+        conn.execute("INSERT INTO campaign_text_fts (campaign_title, campaign_description, last_update_content, campaign_key, campaign_url) VALUES (?, ?, ?, ?, ?)",
+                     (*texts, campaign_key, campaign_data_dict['campaign_url']))
+
+def index_latest_campaign_texts(conn):
+    """Indexes the text of every campaign's latest snapshot, e.g. after the search index is rebuilt."""
+    latest_index = load_campaign_latest_index()
+    for campaign_url in latest_index:
+        campaign_summary = get_latest_campaign_summary(campaign_url, latest_index)
+        if campaign_summary:
+            index_campaign_text(conn, campaign_summary)
+
+def update_search_index_campaign(campaign_data_dict):
+    """Replaces a campaign's indexed title, description and last update with the given summary."""
+    conn = connect_search_index()
+    try:
+        with conn:
+            index_campaign_text(conn, campaign_data_dict)
     except Exception as e:
-        print(f"Error reading {CAMPAIGNS_CSV}: {e}")
-    return scraped
+        print(f"Error updating search index {SEARCH_INDEX_DB} for {campaign_data_dict['campaign_url']}: {e}")
+    finally:
+        conn.close()
+
+def sync_search_index():
+    """
+    Catches the search index up with donation comments appended since it was last synced, rebuilding
+    it (with the latest campaign texts) if it is missing, has an older schema or was built for other
+    donations storage.
+    """
+    return sync_donations_index(SEARCH_INDEX_DB, SEARCH_INDEX_SCHEMA_VERSION, connect_search_index,
+                                update_search_index_donations, on_rebuild=index_latest_campaign_texts)
+
+def rebuild_search_index():
+    """Rebuilds the search index from donations.csv and the latest campaign snapshots."""
+    if donations_csv_needs_backfill():
+        print(f"{DONATIONS_CSV} predates the typed columns. Run -backfill first.")
+        return
+    if os.path.exists(SEARCH_INDEX_DB):
+        os.remove(SEARCH_INDEX_DB)
+    indexed = sync_search_index()
+    print(f"Rebuilt search index {SEARCH_INDEX_DB} from {indexed} donations and {len(load_campaign_latest_index())} campaigns.")
+
+def load_donation_rollups(granularity, campaign_url):
+    """Loads a campaign's rollups for a granularity ('hourly' or 'daily'), ordered by bucket."""
+    table = ROLLUP_GRANULARITIES[granularity][0]
+    conn = connect_donation_rollups()
+    try:
+        return pd.read_sql_query(f"SELECT {', '.join(ROLLUP_FIELDNAMES)} FROM {table} WHERE campaign_url = ? ORDER BY bucket_start",
+                                 conn, params=(campaign_url,))
+    finally:
+        conn.close()
+
+def get_scraped_campaigns():
+    """Returns the set of scraped campaign URLs from the campaign latest index."""
+    return set(load_campaign_latest_index())
 
 def get_existing_donation_keys_for_url(url_to_check):
     """
@@ -70,7 +992,7 @@ def get_existing_donation_keys_for_url(url_to_check):
     if not os.path.exists(DONATIONS_CSV):
         return existing_keys
     try:
-        with open(DONATIONS_CSV, 'r', newline='', encoding='utf-8') as f:
+        with open_donations_text() as f:
             reader = csv.DictReader(f)
             for row in reader:
                 if row['campaign_url'] == url_to_check:
@@ -87,42 +1009,99 @@ def get_existing_donation_keys_for_url(url_to_check):
     return existing_keys
 
 def save_or_update_campaign_summary(campaign_data_dict):
-    """Saves or updates a campaign's summary in campaigns.csv."""
-    fieldnames = ['campaign_url', 'total_donors_count', 'amount_raised', 'campaign_creator', 'funds_receiver', 'campaign_title', 'campaign_description', 'last_update_date', 'last_update_content', 'summed_donations', 'scraped_at']
-    campaign_url_to_update = campaign_data_dict['campaign_url']
-    
-    rows = []
-    updated = False
+    """
+    Appends a campaign summary snapshot to campaign_history.csv and points the
+    latest index at it. Both writes are appends; campaigns.csv is refreshed on compaction.
+    """
+    row_data = [campaign_data_dict.get(field, '') for field in CAMPAIGN_FIELDNAMES]
+    try:
+        history_offset = append_to_csv_with_offset(CAMPAIGN_HISTORY_CSV, row_data)
+        append_to_csv(CAMPAIGN_LATEST_INDEX_CSV, [campaign_data_dict['campaign_url'], history_offset])
+    except Exception as e:
+        print(f"Error appending campaign summary to {CAMPAIGN_HISTORY_CSV}: {e}")
 
-    if os.path.exists(CAMPAIGNS_CSV):
-        try:
-            with open(CAMPAIGNS_CSV, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['campaign_url'] == campaign_url_to_update:
-                        rows.append(campaign_data_dict) # Replace with new data
-                        updated = True
-                    else:
-                        rows.append(row)
-        except Exception as e:
-            print(f"Error reading {CAMPAIGNS_CSV} for update: {e}. Will attempt to overwrite.")
-            # If reading fails catastrophically, we might lose old data if we proceed to write.
-            # Use this for now, but this could be made more robust (e.g., backup before write).
+def seed_campaign_history_from_campaigns_csv():
+    """Seeds an empty campaign history with the rows of a pre-existing campaigns.csv."""
+    seeded = 0
+    try:
+        with open(CAMPAIGNS_CSV, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                save_or_update_campaign_summary(row)
+                seeded += 1
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error seeding {CAMPAIGN_HISTORY_CSV} from {CAMPAIGNS_CSV}: {e}")
+    if seeded:
+        print(f"Seeded {CAMPAIGN_HISTORY_CSV} with {seeded} existing campaign summaries.")
 
-    if not updated:
-        rows.append(campaign_data_dict) # Add as new if not found or file didn't exist/was empty
+def load_campaign_latest_index():
+    """Returns a dict of campaign_url -> byte offset of its latest snapshot in campaign_history.csv."""
+    latest_index = {}
+    try:
+        with open(CAMPAIGN_LATEST_INDEX_CSV, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                latest_index[row['campaign_url']] = int(row['history_offset']) # Later entries win
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading {CAMPAIGN_LATEST_INDEX_CSV}: {e}")
+    return latest_index
+
+def get_latest_campaign_summary(campaign_url, latest_index=None):
+    """Returns the latest summary snapshot for a campaign as a dict, or None if it was never scraped."""
+    if latest_index is None:
+        latest_index = load_campaign_latest_index()
+    history_offset = latest_index.get(campaign_url)
+    if history_offset is None:
+        return None
+    row = read_csv_row_at_offset(CAMPAIGN_HISTORY_CSV, history_offset)
+    return dict(zip(CAMPAIGN_FIELDNAMES, row)) if row else None
+
+def write_campaign_latest_index(latest_index):
+    """Atomically rewrites the latest index with one entry per campaign."""
+    temp_path = CAMPAIGN_LATEST_INDEX_CSV + '.tmp'
+    with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CAMPAIGN_LATEST_INDEX_FIELDNAMES)
+        writer.writerows(latest_index.items())
+    os.replace(temp_path, CAMPAIGN_LATEST_INDEX_CSV)
 
+def rebuild_campaign_latest_index():
+    """Rebuilds the latest index by scanning campaign_history.csv."""
+    latest_index = {}
     try:
-        with open(CAMPAIGNS_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+        for history_offset, row in iter_csv_rows_with_offsets(CAMPAIGN_HISTORY_CSV):
+            latest_index[row[0]] = history_offset # campaign_url is the first column
+        write_campaign_latest_index(latest_index)
+    except Exception as e:
+        print(f"Error rebuilding {CAMPAIGN_LATEST_INDEX_CSV} from {CAMPAIGN_HISTORY_CSV}: {e}")
+        return
+    print(f"Rebuilt {CAMPAIGN_LATEST_INDEX_CSV} for {len(latest_index)} campaigns.")
+
+def compact_campaign_history():
+    """
+    Compacts the latest index to one entry per campaign and regenerates
+    campaigns.csv from the latest snapshots. The history itself is kept intact.
+    """
+    latest_index = load_campaign_latest_index()
+    try:
+        write_campaign_latest_index(latest_index)
+        temp_path = CAMPAIGNS_CSV + '.tmp'
+        with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CAMPAIGN_FIELDNAMES)
+            for history_offset in latest_index.values():
+                writer.writerow(read_csv_row_at_offset(CAMPAIGN_HISTORY_CSV, history_offset))
+        os.replace(temp_path, CAMPAIGNS_CSV)
     except Exception as e:
-        print(f"Error writing updated data to {CAMPAIGNS_CSV}: {e}")
+        print(f"Error compacting campaign history: {e}")
+        return
+    print(f"Compacted campaign history; {CAMPAIGNS_CSV} now holds the latest snapshot of {len(latest_index)} campaigns.")
 
 def calculate_summed_donations_for_url(campaign_url):
     """
-    Reads donations.csv, filters by campaign_url, cleans donation amounts,
+    Streams donations.csv, filters by campaign_url, cleans donation amounts,
     and returns the sum of these donations.
     """
     if not os.path.exists(DONATIONS_CSV):
@@ -130,25 +1109,19 @@ def calculate_summed_donations_for_url(campaign_url):
         return 0.0
 
     try:
-        df = pd.read_csv(DONATIONS_CSV)
-        if df.empty:
+        rows_read = 0
+        total_summed = 0.0
+        # Stream only the needed columns in chunks so memory stays flat as donations grow
+        for chunk in read_donations_in_chunks(['campaign_url', 'amount', 'amount_value']):
+            rows_read += len(chunk)
+            # Filter for the specific campaign
+            campaign_donations_df = chunk[chunk['campaign_url'] == campaign_url]
+            # Sum the cleaned amounts, fill NaN with 0 before summing
+            total_summed += get_donation_amount_values(campaign_donations_df).fillna(0).sum()
+
+        if rows_read == 0:
             print(f"Warning: {DONATIONS_CSV} is empty. Cannot calculate summed donations for {campaign_url}.")
             return 0.0
-        
-        # Filter for the specific campaign
-        campaign_donations_df = df[df['campaign_url'] == campaign_url].copy() # Use .copy() to avoid SettingWithCopyWarning
-        
-        if campaign_donations_df.empty:
-            # This can happen if the campaign had no donations scraped or if the URL is new
-            # print(f"No donations found in {DONATIONS_CSV} for {campaign_url}. Summed donations will be 0.")
-            return 0.0
-
-        # Clean the 'amount' column
-        campaign_donations_df['amount_cleaned'] = campaign_donations_df['amount'].astype(str).str.replace(r'[$,USD\s]', '', regex=True)
-        campaign_donations_df['amount_cleaned'] = pd.to_numeric(campaign_donations_df['amount_cleaned'], errors='coerce')
-        
-        # Sum the cleaned amounts, fill NaN with 0 before summing
-        total_summed = campaign_donations_df['amount_cleaned'].fillna(0).sum()
         return round(total_summed, 2)
         
     except pd.errors.EmptyDataError:
@@ -468,6 +1441,7 @@ def scrape_campaign(url, rescrape_mode=False):  # Added rescrape_mode parameter
 
             donation_elements = recent_donations_container.select(donation_item_selector)
             new_donations_found_in_batch = 0
+            batch_donation_rows = [] # Written together so gzip storage compresses each batch as one frame
 
             for item in donation_elements:
                 donation_html_id = str(item) # Use HTML content as a simple ID
@@ -493,12 +1467,15 @@ def scrape_campaign(url, rescrape_mode=False):  # Added rescrape_mode parameter
                         new_donations_found_in_batch += 1 # Count it as "found" in this batch for load more logic
                         continue # Skip appending to CSV
 
-                donation_csv_row = [url, donor_name, amount, relative_time_str, comment, scraped_at_timestamp]
-                append_to_csv(DONATIONS_CSV, donation_csv_row)
+                donation_csv_row = build_donation_row(url, donor_name, amount, relative_time_str, comment, scraped_at_timestamp)
+                batch_donation_rows.append(donation_csv_row)
                 
                 processed_donation_ids.add(donation_html_id)
                 new_donations_found_in_batch += 1
             
+            if batch_donation_rows:
+                append_donation_rows(batch_donation_rows)
+
             print(f"Found {new_donations_found_in_batch} new unique donations in this batch. Total unique donations processed this session: {len(processed_donation_ids)}")
 
             if new_donations_found_in_batch == 0:
@@ -546,6 +1523,7 @@ def scrape_campaign(url, rescrape_mode=False):  # Added rescrape_mode parameter
             'scraped_at': scraped_at_timestamp
         }
         save_or_update_campaign_summary(campaign_summary_data)
+        update_search_index_campaign(campaign_summary_data)
         print(f"Campaign summary saved/updated for {url}")
 
     except Exception as e:
@@ -554,102 +1532,53 @@ def scrape_campaign(url, rescrape_mode=False):  # Added rescrape_mode parameter
     finally:
         if driver is not None:
             driver.quit()
+        # Also catches up rows left unindexed by an earlier interrupted scrape
+        sync_donation_rollups()
+        sync_donor_index()
+        sync_search_index()
         print(f"[{datetime.datetime.now().isoformat()}] Finished scrape for: {url}")
 
 def get_aggregated_donor_data(top_n=10):
     """
-    Reads donations.csv, processes data, groups similar donor names,
-    and returns aggregated top donor data and alias map.
+    Returns the top donors and an alias map from the donor index, so similar names are
+    grouped by the same clustering as -donor and -overlap lookups.
     """
     if not os.path.exists(DONATIONS_CSV):
         print(f"Error: {DONATIONS_CSV} not found. Scrape some data first.")
         return None, None
 
+    sync_donor_index()
+    conn = connect_donor_index()
     try:
-        df = pd.read_csv(DONATIONS_CSV)
-    except pd.errors.EmptyDataError:
-        print(f"Error: {DONATIONS_CSV} is empty. Scrape some data first.")
-        return None, None
+        top_clusters = conn.execute(
+            """SELECT totals.cluster_id, clusters.canonical_name, SUM(totals.amount_total) AS amount_total
+               FROM donor_campaign_totals AS totals
+               JOIN donor_clusters AS clusters ON clusters.cluster_id = totals.cluster_id
+               GROUP BY totals.cluster_id
+               ORDER BY amount_total DESC
+               LIMIT ?""",
+            (top_n,)
+        ).fetchall()
+        alias_map = {}
+        for cluster_id, canonical_name, _ in top_clusters:
+            aliases = conn.execute("SELECT alias FROM donor_aliases WHERE cluster_id = ?", (cluster_id,)).fetchall()
+            alias_map[canonical_name] = {alias for (alias,) in aliases}
     except Exception as e:
-        print(f"Error reading {DONATIONS_CSV}: {e}")
-        return None, None
-
-    if df.empty:
-        print(f"{DONATIONS_CSV} contains no data. Scrape some data first.")
+        print(f"Error reading donor index {DONOR_INDEX_DB}: {e}")
         return None, None
+    finally:
+        conn.close()
 
-    df['amount_cleaned'] = df['amount'].astype(str).str.replace(r'[$,USD\s]', '', regex=True)
-    df['amount_cleaned'] = pd.to_numeric(df['amount_cleaned'], errors='coerce')
-    df.dropna(subset=['amount_cleaned'], inplace=True)
-
-    anonymous_patterns = ["anonymous", "anonymous giver"]
-    df_filtered = df[~df['donor_name'].astype(str).str.lower().isin(anonymous_patterns)]
-    df_filtered = df_filtered[~df_filtered['donor_name'].isin(["Anonymous Giver", "Anonymous"])]
-
-    if df_filtered.empty:
+    if not top_clusters:
         print("No non-anonymous donations with valid amounts found.")
         return None, None
 
-    df_filtered['normalized_donor_name'] = df_filtered['donor_name'].astype(str).str.lower().str.strip()
-    normalized_to_originals_map = {}
-    for _, row in df_filtered.iterrows():
-        norm_name = row['normalized_donor_name']
-        orig_name = str(row['donor_name']).strip()
-        if norm_name not in normalized_to_originals_map:
-            normalized_to_originals_map[norm_name] = set()
-        normalized_to_originals_map[norm_name].add(orig_name)
-
-    unique_normalized_names = list(df_filtered['normalized_donor_name'].unique())
-    normalized_name_groups = []
-    processed_indices = set()
-    similarity_threshold = 88
-
-    for i in range(len(unique_normalized_names)):
-        if i in processed_indices:
-            continue
-        current_normalized_name = unique_normalized_names[i]
-        current_normalized_group = [current_normalized_name]
-        processed_indices.add(i)
-        for j in range(i + 1, len(unique_normalized_names)):
-            if j in processed_indices:
-                continue
-            other_normalized_name = unique_normalized_names[j]
-            if fuzz.token_sort_ratio(current_normalized_name, other_normalized_name) > similarity_threshold:
-                current_normalized_group.append(other_normalized_name)
-                processed_indices.add(j)
-        normalized_name_groups.append(current_normalized_group)
-
-    variant_to_canonical_normalized_map = {}
-    canonical_normalized_to_all_original_aliases_map = {}
-    for norm_group in normalized_name_groups:
-        if not norm_group: continue
-        canonical_normalized_name = sorted(norm_group)[0]
-        all_original_aliases_for_this_group = set()
-        for norm_name_in_group in norm_group:
-            variant_to_canonical_normalized_map[norm_name_in_group] = canonical_normalized_name
-            if norm_name_in_group in normalized_to_originals_map:
-                all_original_aliases_for_this_group.update(normalized_to_originals_map[norm_name_in_group])
-            else:
-                all_original_aliases_for_this_group.add(norm_name_in_group)
-        canonical_normalized_to_all_original_aliases_map[canonical_normalized_name] = all_original_aliases_for_this_group
-    
-    df_filtered['canonical_group_id'] = df_filtered['normalized_donor_name'].map(variant_to_canonical_normalized_map)
-    df_filtered['canonical_group_id'].fillna(df_filtered['normalized_donor_name'], inplace=True)
-    
-    for group_id in df_filtered['canonical_group_id'].unique():
-        if group_id not in canonical_normalized_to_all_original_aliases_map:
-            if group_id in normalized_to_originals_map:
-                 canonical_normalized_to_all_original_aliases_map[group_id] = normalized_to_originals_map[group_id]
-            else:
-                 canonical_normalized_to_all_original_aliases_map[group_id] = {group_id}
-
-    top_donors_aggregated = df_filtered.groupby('canonical_group_id')['amount_cleaned'].sum().nlargest(top_n)
-    
-    if top_donors_aggregated.empty:
-        print("No data to aggregate for top donors after fuzzy grouping and filtering.")
-        return None, None
-        
-    return top_donors_aggregated, canonical_normalized_to_all_original_aliases_map
+    top_donors_aggregated = pd.Series(
+        [amount_total for _, _, amount_total in top_clusters],
+        index=[canonical_name for _, canonical_name, _ in top_clusters],
+        name='amount_total'
+    )
+    return top_donors_aggregated, alias_map
 
 
 def visualize_top_donors():
@@ -711,6 +1640,216 @@ def list_top_donors(top_n_to_list):
     print("--- End of List ---")
 
 
+def show_campaign_history(campaign_url):
+    """Prints a campaign's amount raised and donor count over time from campaign_history.csv."""
+    history_columns = ['campaign_url', 'scraped_at', 'amount_raised', 'total_donors_count', 'summed_donations']
+    try:
+        history_df = pd.read_csv(CAMPAIGN_HISTORY_CSV, usecols=history_columns, dtype=str, keep_default_na=False)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        print(f"{CAMPAIGN_HISTORY_CSV} not found or empty. Scrape some data first.")
+        return
+    except Exception as e:
+        print(f"Error reading {CAMPAIGN_HISTORY_CSV}: {e}")
+        return
+
+    history_df = history_df[history_df['campaign_url'] == campaign_url].sort_values('scraped_at')
+    if history_df.empty:
+        print(f"No history found for {campaign_url}.")
+        return
+
+    amount_raised_values = normalize_amount_series(history_df['amount_raised'])[0]
+    amount_raised_changes = amount_raised_values.diff()
+
+    print(f"\n--- Campaign History for {campaign_url} ({len(history_df)} snapshots) ---")
+    for index, row in history_df.iterrows():
+        change = amount_raised_changes[index]
+        change_str = f" ({change:+,.2f})" if pd.notna(change) else ""
+        print(f"{row['scraped_at']}: raised {row['amount_raised']}{change_str}, "
+              f"donors {row['total_donors_count']}, summed donations ${float(row['summed_donations'] or 0):,.2f}")
+    print("--- End of History ---")
+
+def lookup_donor(donor_name):
+    """Prints the campaigns a donor (and their aliases) gave to, with totals, from the donor index."""
+    normalized_name = donor_name.strip().lower()
+    conn = connect_donor_index()
+    try:
+        found = conn.execute("SELECT cluster_id FROM donor_names WHERE normalized_name = ?", (normalized_name,)).fetchone()
+        cluster_id = found[0] if found else find_donor_cluster(conn, normalized_name)
+        if cluster_id is None:
+            print(f"No donor found matching '{donor_name}'.")
+            return
+
+        aliases = [alias for (alias,) in conn.execute("SELECT alias FROM donor_aliases WHERE cluster_id = ? ORDER BY alias", (cluster_id,))]
+        campaign_totals = conn.execute(
+            "SELECT campaign_url, donation_count, amount_total FROM donor_campaign_totals WHERE cluster_id = ? ORDER BY amount_total DESC",
+            (cluster_id,)
+        ).fetchall()
+        recent_offsets = conn.execute(
+            """SELECT row_offset FROM donor_donation_offsets WHERE cluster_id = ?
+               ORDER BY donated_at_estimated DESC, row_offset LIMIT ?""",
+            (cluster_id, DONOR_LOOKUP_ROW_LIMIT)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    print(f"\n--- Donor: {aliases[0] if aliases else donor_name} ---")
+    if len(aliases) > 1:
+        print(f"Aliases: {', '.join(aliases)}")
+    total_amount = sum(amount_total for _, _, amount_total in campaign_totals)
+    total_count = sum(donation_count for _, donation_count, _ in campaign_totals)
+    print(f"Total: ${total_amount:,.2f} from {total_count} donations to {len(campaign_totals)} campaigns")
+    rank = 1
+    for campaign_url, donation_count, amount_total in campaign_totals:
+        print(f"{rank}. {campaign_url}: ${amount_total:,.2f} from {donation_count} donations")
+        rank += 1
+
+    print(f"\nMost recent {len(recent_offsets)} donations:")
+    for (row_offset,) in recent_offsets:
+        row_dict = dict(zip(DONATION_FIELDNAMES, read_donation_row(row_offset) or []))
+        print(f"  {row_dict.get('donated_at_estimated') or row_dict.get('donation_relative_time', 'N/A')} "
+              f"{row_dict.get('donor_name', 'N/A')} gave {row_dict.get('amount', 'N/A')} to {row_dict.get('campaign_url', 'N/A')}")
+    print("--- End of Donor ---")
+
+def list_overlapping_campaigns(campaign_url, top_n=10):
+    """Lists campaigns sharing the most (non-anonymous) donors with the given campaign, from the donor index."""
+    conn = connect_donor_index()
+    try:
+        overlaps = conn.execute(
+            """SELECT other.campaign_url, COUNT(*) AS shared_donors, SUM(other.amount_total) AS shared_amount
+               FROM donor_campaign_totals AS this
+               JOIN donor_campaign_totals AS other
+                 ON other.cluster_id = this.cluster_id AND other.campaign_url != this.campaign_url
+               WHERE this.campaign_url = ?
+               GROUP BY other.campaign_url
+               ORDER BY shared_donors DESC, shared_amount DESC
+               LIMIT ?""",
+            (campaign_url, top_n)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    if not overlaps:
+        print(f"No campaigns share donors with {campaign_url}.")
+        return
+
+    print(f"\n--- Campaigns Sharing Donors with {campaign_url} ---")
+    rank = 1
+    for other_campaign_url, shared_donors, shared_amount in overlaps:
+        print(f"{rank}. {other_campaign_url}: {shared_donors} shared donors, who gave ${shared_amount:,.2f} there")
+        rank += 1
+    print("--- End of List ---")
+
+def search_text(query, campaign_url=None, limit=10):
+    """
+    Full-text searches donation comments and campaign text, printing ranked (bm25) results.
+    Supports FTS5 query syntax, e.g. phrases ("thank you"), prefixes (pray*), AND/OR/NOT.
+    The campaign filter is part of the MATCH expression, so it uses the index rather than
+    filtering every match. The campaign_key column is given no weight when ranking.
+    """
+    conn = connect_search_index()
+    try:
+        campaign_filter = ""
+        if campaign_url:
+            campaign_key = get_campaign_search_key(conn, campaign_url, create=False)
+            if campaign_key is None:
+                print(f"No indexed text found for campaign {campaign_url}.")
+                return
+            campaign_filter = f" AND campaign_key : {campaign_key}"
+        comment_results = conn.execute(
+            "SELECT campaign_url, donor_name, snippet(donation_comments_fts, 0, '[', ']', '...', 16) FROM donation_comments_fts "
+            "WHERE donation_comments_fts MATCH ? ORDER BY bm25(donation_comments_fts, 1.0, 1.0, 0.0) LIMIT ?",
+            (f"{SEARCH_COMMENT_COLUMNS} : ({query}){campaign_filter}", limit)
+        ).fetchall()
+        campaign_results = conn.execute(
+            "SELECT campaign_url, campaign_title, snippet(campaign_text_fts, -1, '[', ']', '...', 16) FROM campaign_text_fts "
+            "WHERE campaign_text_fts MATCH ? ORDER BY bm25(campaign_text_fts, 1.0, 1.0, 1.0, 0.0) LIMIT ?",
+            (f"{SEARCH_CAMPAIGN_TEXT_COLUMNS} : ({query}){campaign_filter}", limit)
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        print(f"Invalid search query '{query}': {e}")
+        return
+    finally:
+        conn.close()
+
+    print(f"\n--- Campaign Matches for '{query}' ({len(campaign_results)}) ---")
+    rank = 1
+    for result_campaign_url, campaign_title, snippet in campaign_results:
+        print(f"{rank}. {campaign_title} ({result_campaign_url})")
+        print("   " + snippet.replace('\n', ' '))
+        rank += 1
+
+    print(f"\n--- Donation Comment Matches for '{query}' ({len(comment_results)}) ---")
+    rank = 1
+    for result_campaign_url, donor_name, snippet in comment_results:
+        print(f"{rank}. {donor_name} on {result_campaign_url}")
+        print("   " + snippet.replace('\n', ' '))
+        rank += 1
+    print("--- End of Results ---")
+
+def list_top_campaigns_by_inflow(top_n, window_hours=24):
+    """Lists the top N campaigns by donation amount over the last window_hours, using the hourly rollups."""
+    if top_n <= 0:
+        print("Number of campaigns to list must be a positive integer.")
+        return
+
+    window_start = datetime.datetime.now() - datetime.timedelta(hours=window_hours)
+    # Bucket starts are ISO strings, so they compare chronologically as strings
+    window_start_bucket = window_start.strftime('%Y-%m-%dT%H:00:00')
+
+    conn = connect_donation_rollups()
+    try:
+        # Only the window's buckets are read, through the bucket_start index
+        inflow_rows = conn.execute(
+            """SELECT campaign_url, SUM(donation_count), SUM(amount_total) AS inflow FROM rollups_hourly
+               WHERE bucket_start >= ? GROUP BY campaign_url ORDER BY inflow DESC LIMIT ?""",
+            (window_start_bucket, top_n)
+        ).fetchall()
+    finally:
+        conn.close()
+    if not inflow_rows:
+        print(f"No donations found in the last {window_hours} hours.")
+        return
+
+    print(f"\n--- Top {len(inflow_rows)} Campaigns by Inflow (Last {window_hours} Hours) ---")
+    rank = 1
+    for campaign_url, donation_count, amount_total in inflow_rows:
+        print(f"{rank}. {campaign_url}: ${amount_total:,.2f} from {donation_count} donations")
+        rank += 1
+    print("--- End of List ---")
+
+def show_campaign_velocity(campaign_url, window_hours=24):
+    """Prints donation velocity for a campaign: donations/hour, amount per day and hourly spikes."""
+    hourly_df = load_donation_rollups('hourly', campaign_url)
+    daily_df = load_donation_rollups('daily', campaign_url)
+    if hourly_df.empty:
+        print(f"No timestamped donations found for {campaign_url}.")
+        return
+
+    # Fill the campaign's active span with empty hours so rates and spikes account for quiet periods
+    hourly_counts = hourly_df.set_index(pd.to_datetime(hourly_df['bucket_start']))['donation_count']
+    hourly_counts = hourly_counts.reindex(pd.date_range(hourly_counts.index.min(), hourly_counts.index.max(), freq='h'), fill_value=0)
+
+    window_start_bucket = (datetime.datetime.now() - datetime.timedelta(hours=window_hours)).strftime('%Y-%m-%dT%H:00:00')
+    recent_df = hourly_df[hourly_df['bucket_start'] >= window_start_bucket]
+
+    print(f"\n--- Donation Velocity for {campaign_url} ---")
+    print(f"Overall: {hourly_counts.sum()} donations over {len(hourly_counts)} hours ({hourly_counts.mean():.2f} donations/hour)")
+    print(f"Last {window_hours} hours: {recent_df['donation_count'].sum()} donations, ${recent_df['amount_total'].sum():,.2f} "
+          f"({recent_df['donation_count'].sum() / window_hours:.2f} donations/hour)")
+
+    print("\nAmount per day:")
+    for _, row in daily_df.sort_values('bucket_start').iterrows():
+        print(f"  {row['bucket_start']}: ${row['amount_total']:,.2f} from {int(row['donation_count'])} donations")
+
+    spike_threshold = hourly_counts.mean() + VELOCITY_SPIKE_STDDEVS * hourly_counts.std(ddof=0)
+    spikes = hourly_counts[hourly_counts > spike_threshold]
+    print(f"\nSpikes (hours with more than {spike_threshold:.1f} donations):")
+    if spikes.empty:
+        print("  None")
+    for bucket_start, count in spikes.items():
+        print(f"  {bucket_start.isoformat()}: {count} donations")
+    print("--- End of Velocity ---")
+
 def main():
     parser = argparse.ArgumentParser(description="Scrape GiveSendGo campaign data and optionally visualize or list donors.")
     
@@ -719,18 +1858,64 @@ def main():
     input_method_group.add_argument("-url", metavar='URL', help="A single GiveSendGo campaign URL to scrape.")
     input_method_group.add_argument("-file", metavar='FILEPATH', help="Path to a .txt file containing line-separated GiveSendGo URLs.")
     
-    parser.add_argument("-rescrape", action="store_true", help="Rescrape URLs even if they appear in campaigns.csv. Default is to skip.")
+    parser.add_argument("-rescrape", action="store_true", help="Rescrape URLs even if they appear in the campaign history. Default is to skip.")
     
     # Analysis options (mutually exclusive with each other for simplicity, and run independently of scraping)
     analysis_group = parser.add_argument_group('Analysis Options (run independently of scraping)')
     analysis_action_group = analysis_group.add_mutually_exclusive_group()
     analysis_action_group.add_argument("-visualize", action="store_true", help="Visualize top 10 donors from donations.csv and exit.")
     analysis_action_group.add_argument("-list", "--list_donors", metavar='N', type=int, help="List the top N donors from donations.csv to the console and exit.")
+    analysis_action_group.add_argument("-top_inflow", metavar='N', type=int, help="List the top N campaigns by donation inflow over the last -window_hours and exit.")
+    analysis_action_group.add_argument("-velocity", metavar='URL', help="Show donation velocity (donations/hour, amount per day, spikes) for a campaign and exit.")
+    analysis_action_group.add_argument("-history", metavar='URL', help="Show a campaign's amount raised and donor count over time and exit.")
+    analysis_action_group.add_argument("-donor", metavar='NAME', help="Show the campaigns a donor (and their aliases) gave to and exit.")
+    analysis_action_group.add_argument("-overlap", metavar='URL', help="List the campaigns sharing the most donors with a campaign and exit.")
+    analysis_action_group.add_argument("-search", metavar='QUERY', help="Full-text search donation comments and campaign text (FTS5 syntax: \"phrase\", prefix*) and exit.")
+    analysis_group.add_argument("-search_campaign", metavar='URL', help="Restrict -search results to a single campaign.")
+    analysis_group.add_argument("-search_limit", metavar='N', type=int, default=10, help="Maximum number of results per section for -search. Default is 10.")
+    analysis_group.add_argument("-window_hours", metavar='H', type=int, default=24, help="Time window in hours for -top_inflow and -velocity. Default is 24.")
+
+    maintenance_group = parser.add_argument_group('Maintenance Options (run independently of scraping)')
+    maintenance_group.add_argument("-backfill", action="store_true", help="Compute amount_value, currency and donated_at_estimated for all rows in donations.csv and exit.")
+    maintenance_group.add_argument("-rebuild_rollups", action="store_true", help="Rebuild the hourly/daily donation rollups from donations.csv and exit.")
+    maintenance_group.add_argument("-rebuild_donor_index", action="store_true", help="Rebuild the donor index from donations.csv and exit.")
+    maintenance_group.add_argument("-rebuild_search_index", action="store_true", help="Rebuild the full-text search index and exit.")
+    maintenance_group.add_argument("-convert_donations", action="store_true", help="Convert donations from the other storage format into the one set by DONATIONS_STORAGE (csv or gzip) and exit.")
+    maintenance_group.add_argument("-compact_history", action="store_true", help="Compact the campaign latest index, regenerate campaigns.csv and exit.")
 
     args = parser.parse_args()
 
+    storage_conflict = get_donations_storage_conflict()
+    if storage_conflict and not args.convert_donations:
+        print(f"Error: {storage_conflict}")
+        return
+
     init_csv_files() 
 
+    if args.backfill:
+        backfill_typed_donation_columns()
+        return
+
+    if args.rebuild_rollups:
+        rebuild_donation_rollups()
+        return
+
+    if args.rebuild_donor_index:
+        rebuild_donor_index()
+        return
+
+    if args.rebuild_search_index:
+        rebuild_search_index()
+        return
+
+    if args.convert_donations:
+        convert_donations_storage()
+        return
+
+    if args.compact_history:
+        compact_campaign_history()
+        return
+
     if args.visualize:
         visualize_top_donors()
         return
@@ -739,6 +1924,35 @@ def main():
         list_top_donors(args.list_donors)
         return
 
+    if args.top_inflow is not None:
+        sync_donation_rollups()
+        list_top_campaigns_by_inflow(args.top_inflow, args.window_hours)
+        return
+
+    if args.velocity:
+        sync_donation_rollups()
+        show_campaign_velocity(args.velocity, args.window_hours)
+        return
+
+    if args.history:
+        show_campaign_history(args.history)
+        return
+
+    if args.donor:
+        sync_donor_index()
+        lookup_donor(args.donor)
+        return
+
+    if args.overlap:
+        sync_donor_index()
+        list_overlapping_campaigns(args.overlap)
+        return
+
+    if args.search:
+        sync_search_index()
+        search_text(args.search, args.search_campaign, args.search_limit)
+        return
+
     if not args.url and not args.file:
         print("Error: You must provide either -url or -file for scraping if not using -visualize or -list.")
         parser.print_help()
@@ -782,9 +1996,17 @@ def main():
         print("No new URLs to scrape in this session.")
         return
     
+    backfill_donations_if_needed()
+    sync_donation_rollups()
+    sync_donor_index()
+    sync_search_index()
+
     print(f"Preparing to scrape {len(valid_urls_for_current_session)} URL(s).")
     for url_item in valid_urls_for_current_session:
         scrape_campaign(url_item, args.rescrape)
 
+    # Summaries were only appended during the session; refresh campaigns.csv once at the end
+    compact_campaign_history()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file